@@ -1,39 +1,83 @@
 # app.py
-import io
+import json
+import zlib
 from datetime import date, timedelta
 
 import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from fpdf.errors import FPDFUnicodeEncodingException
 
 # ---------- Page config ----------
 st.set_page_config(page_title="Travel Budget Planner", page_icon="🧳", layout="wide")
 
+# ---------- Itinerary ideas (by rough budget band) ----------
+_IDEAS_LOW: tuple[str, ...] = (
+    "Self-guided city walk",
+    "Local street food tour",
+    "Public park & viewpoint",
+    "Free museum/gallery day",
+    "Beach sunset & night market",
+)
+_IDEAS_MID: tuple[str, ...] = (
+    "Guided city tour",
+    "Cultural show or cooking class",
+    "Day-pass for metro/transport",
+    "Boat ride / short cruise",
+    "Museum + specialty café",
+)
+_IDEAS_HIGH: tuple[str, ...] = (
+    "Theme park or adventure activity",
+    "Full-day guided excursion",
+    "Scenic railway or hot air balloon (location permitting)",
+    "Private food tasting tour",
+    "Fine dining experience",
+)
+
 # ---------- Helpers ----------
 def normalize_weights(weights: dict) -> dict:
-    total = sum(weights.values())
+    keys = tuple(weights)
+    vals = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    total = vals.sum()
     if total == 0:
         # avoid div-by-zero: default to equal
-        n = len(weights)
-        return {k: 100 / n for k in weights}
-    return {k: (v / total) * 100 for k, v in weights.items()}
+        pcts = np.full_like(vals, 100.0 / len(vals))
+    else:
+        pcts = vals * (100.0 / total)
+    return dict(zip(keys, pcts.tolist()))
 
 def money(amount, currency):
     # lightweight formatter (no fx conversion here)
     return f"{currency} {amount:,.2f}"
 
+def _freeze(d: dict) -> tuple:
+    # hashable, order-preserving view of a dict for st.cache_data keys
+    return tuple(d.items())
+
 def build_allocation_df(alloc_pct: dict, total_budget: float, currency: str):
-    rows = []
-    for k, pct in alloc_pct.items():
-        amt = total_budget * (pct / 100)
-        rows.append({"Category": k, "Share %": round(pct, 1), "Amount": money(amt, currency)})
-    df = pd.DataFrame(rows).sort_values("Share %", ascending=False)
+    return _build_allocation_df(_freeze(alloc_pct), total_budget, currency)
+
+@st.cache_data(ttl=3600, max_entries=64)
+def _build_allocation_df(alloc_items: tuple, total_budget: float, currency: str):
+    alloc_pct = dict(alloc_items)
+    cats = np.array(list(alloc_pct.keys()))
+    pcts = np.fromiter(alloc_pct.values(), dtype=np.float64, count=len(alloc_pct))
+    amts = total_budget * pcts / 100.0
+    df = pd.DataFrame({"Category": cats, "Share %": np.round(pcts, 1), "Amount_raw": amts})
+    df = df.sort_values("Share %", ascending=False, kind="stable", ignore_index=True)
+    # format once, after sorting
+    df["Amount"] = [money(a, currency) for a in df.pop("Amount_raw")]
     return df
 
 def per_day_breakdown(alloc_pct: dict, total_budget: float, days: int):
     # returns {cat: amount_per_day}
+    return _per_day_breakdown(_freeze(alloc_pct), total_budget, days)
+
+@st.cache_data(ttl=3600, max_entries=64)
+def _per_day_breakdown(alloc_items: tuple, total_budget: float, days: int):
+    alloc_pct = dict(alloc_items)
     return {k: (total_budget * (v / 100)) / max(1, days) for k, v in alloc_pct.items()}
 
 def safe_int(x, minimum=1):
@@ -43,49 +87,54 @@ def safe_int(x, minimum=1):
     except Exception:
         return minimum
 
+@st.cache_data(max_entries=128)
 def generate_itinerary(days: int, destination: str, budget_per_day: float):
     # very simple offline generator; you can swap with Google Places later
     # picks ideas based on rough budget bands
-    ideas_low = [
-        "Self-guided city walk",
-        "Local street food tour",
-        "Public park & viewpoint",
-        "Free museum/gallery day",
-        "Beach sunset & night market",
-    ]
-    ideas_mid = [
-        "Guided city tour",
-        "Cultural show or cooking class",
-        "Day-pass for metro/transport",
-        "Boat ride / short cruise",
-        "Museum + specialty café",
-    ]
-    ideas_high = [
-        "Theme park or adventure activity",
-        "Full-day guided excursion",
-        "Scenic railway or hot air balloon (location permitting)",
-        "Private food tasting tour",
-        "Fine dining experience",
+    if budget_per_day < 50:
+        ideas = _IDEAS_LOW
+    elif budget_per_day < 120:
+        ideas = _IDEAS_MID
+    else:
+        ideas = _IDEAS_HIGH
+
+    # seeded from the inputs so reruns (and the cache) give a stable plan;
+    # crc32 rather than hash(), which is salted per process for str
+    seed = zlib.crc32(repr((destination, days, int(budget_per_day // 10))).encode("utf-8"))
+    rng = np.random.default_rng(seed)
+    # two distinct picks per day, all days at once: the two smallest of a row
+    # of random keys (in order) are a uniform sample-of-2 without replacement
+    keys = rng.random((days, len(ideas)))
+    top2 = np.argpartition(keys, (0, 1), axis=1)[:, :2]
+    ideas_arr = np.array(ideas, dtype=object)
+    morning = np.take(ideas_arr, top2[:, 0])
+    afternoon = np.take(ideas_arr, top2[:, 1])
+    notes = f"Adjust based on {destination} opening times."
+    plan = [
+        {"Day": d, "Morning": morn, "Afternoon/Evening": aft, "Notes": notes}
+        for d, (morn, aft) in enumerate(zip(morning, afternoon), start=1)
     ]
-
-    plan = []
-    for d in range(1, days + 1):
-        if budget_per_day < 50:
-            picks = np.random.choice(ideas_low, size=2, replace=False)
-        elif budget_per_day < 120:
-            picks = np.random.choice(ideas_mid, size=2, replace=False)
-        else:
-            picks = np.random.choice(ideas_high, size=2, replace=False)
-
-        plan.append(
-            {
-                "Day": d,
-                "Morning": picks[0],
-                "Afternoon/Evening": picks[1],
-                "Notes": f"Adjust based on {destination} opening times."
-            }
-        )
-    return pd.DataFrame(plan)
+    # int32 Day and a prebuilt Notes array rather than a broadcast scalar
+    df = pd.DataFrame(
+        {
+            "Day": np.arange(1, days + 1, dtype=np.int32),
+            "Morning": morning,
+            "Afternoon/Evening": afternoon,
+            "Notes": np.full(days, notes, dtype=object),
+        }
+    )
+    # plan doubles as the JSON export, saving a to_dict(orient="records") pass
+    return df, plan
+
+_ALLOC_COLS = ["Category", "Share %", "Amount"]
+_ITIN_COLS = ["Day", "Morning", "Afternoon/Evening", "Notes"]
+# "Helvetica" is the core font fpdf2 would substitute for "Arial"
+_PDF_FONTS = {
+    "title": ("Helvetica", "B", 16),
+    "summary": ("Helvetica", "", 12),
+    "heading": ("Helvetica", "B", 13),
+    "body": ("Helvetica", "", 11),
+}
 
 def build_pdf(data: dict, alloc_df: pd.DataFrame, itin_df: pd.DataFrame) -> bytes:
     pdf = FPDF()
@@ -93,48 +142,79 @@ def build_pdf(data: dict, alloc_df: pd.DataFrame, itin_df: pd.DataFrame) -> byte
     pdf.add_page()
 
     # Title
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "Travel Budget Plan", ln=True)
+    pdf.set_font(*_PDF_FONTS["title"])
+    pdf.cell(0, 10, "Travel Budget Plan", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     # Trip summary
-    pdf.set_font("Arial", "", 12)
-    for k, v in [
+    pdf.set_font(*_PDF_FONTS["summary"])
+    summary = [
         ("Destination", data["destination"]),
-        ("Dates", f'{data["start"].isoformat()} → {(data["start"] + timedelta(days=data["days"]-1)).isoformat()}'),
+        ("Dates", f'{data["start"].isoformat()} to {(data["start"] + timedelta(days=data["days"]-1)).isoformat()}'),
         ("Days", str(data["days"])),
         ("Travelers", str(data["travelers"])),
         ("Total Budget", f'{data["currency"]} {data["total_budget"]:,.2f}'),
         ("Budget / person / day", f'{data["currency"]} {data["per_person_per_day"]:,.2f}'),
-    ]:
-        pdf.cell(0, 8, f"{k}: {v}", ln=True)
+    ]
+    pdf.multi_cell(0, 8, "\n".join(f"{k}: {v}" for k, v in summary),
+                   new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     pdf.ln(4)
-    pdf.set_font("Arial", "B", 13)
-    pdf.cell(0, 8, "Budget Allocation", ln=True)
-    pdf.set_font("Arial", "", 11)
+    pdf.set_font(*_PDF_FONTS["heading"])
+    pdf.cell(0, 8, "Budget Allocation", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font(*_PDF_FONTS["body"])
 
     # Allocation table
     col_w = [60, 30, 50]
     pdf.cell(col_w[0], 8, "Category", border=1)
     pdf.cell(col_w[1], 8, "Share %", border=1)
-    pdf.cell(col_w[2], 8, "Amount", border=1, ln=True)
+    pdf.cell(col_w[2], 8, "Amount", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
-    for _, row in alloc_df.iterrows():
-        pdf.cell(col_w[0], 8, str(row["Category"]), border=1)
-        pdf.cell(col_w[1], 8, str(row["Share %"]), border=1)
-        pdf.cell(col_w[2], 8, str(row["Amount"]), border=1, ln=True)
+    # stringify each column once up front, not per cell
+    for cat, share, amount in alloc_df[_ALLOC_COLS].astype(str).to_numpy():
+        pdf.cell(col_w[0], 8, cat, border=1)
+        pdf.cell(col_w[1], 8, share, border=1)
+        pdf.cell(col_w[2], 8, amount, border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     pdf.ln(4)
-    pdf.set_font("Arial", "B", 13)
-    pdf.cell(0, 8, "Itinerary (Draft)", ln=True)
-    pdf.set_font("Arial", "", 11)
+    pdf.set_font(*_PDF_FONTS["heading"])
+    pdf.cell(0, 8, "Itinerary (Draft)", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font(*_PDF_FONTS["body"])
 
     # Itinerary rows
-    for _, r in itin_df.iterrows():
-        pdf.multi_cell(0, 7, f'Day {int(r["Day"])}: {r["Morning"]} | {r["Afternoon/Evening"]} | {r["Notes"]}')
+    for day, morn, aft, notes in itin_df[_ITIN_COLS].astype(str).to_numpy():
+        pdf.multi_cell(0, 7, f"Day {day}: {morn} | {aft} | {notes}",
+                       new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     # Output
-    return bytes(pdf.output(dest="S").encode("latin-1"))
+    # fpdf2 returns a bytearray directly; no latin-1 re-encode copy
+    return bytes(pdf.output())
+
+def _pdf_unsupported_char(text: str) -> str | None:
+    # core PDF fonts only cover latin-1; returns the first char fpdf2 would reject
+    try:
+        FPDF().normalize_text(text)
+    except FPDFUnicodeEncodingException as e:
+        return e.character
+    return None
+
+def _pdf_key(data: dict, alloc_df: pd.DataFrame, itin_df: pd.DataFrame) -> tuple:
+    # plain hashable/picklable args for _cached_pdf
+    return (
+        tuple(data.items()),
+        tuple(alloc_df[_ALLOC_COLS].itertuples(index=False, name=None)),
+        tuple(itin_df[_ITIN_COLS].itertuples(index=False, name=None)),
+    )
+
+# persisted to disk, so the same plan skips FPDF even in a new session/restart.
+# Streamlit never evicts disk entries (no ttl, no max_entries): each distinct
+# downloaded plan keeps a file in ~/.streamlit/cache until the cache is cleared.
+@st.cache_data(persist="disk")
+def _cached_pdf(key_tuple: tuple, alloc_records: tuple, itin_records: tuple) -> bytes:
+    return build_pdf(
+        dict(key_tuple),
+        pd.DataFrame(list(alloc_records), columns=_ALLOC_COLS),
+        pd.DataFrame(list(itin_records), columns=_ITIN_COLS),
+    )
 
 # ---------- Sidebar (Inputs) ----------
 with st.sidebar:
@@ -174,6 +254,48 @@ with st.sidebar:
     }
     weights = normalize_weights(raw_weights)
 
+# ---------- Derived plan ----------
+per_person_per_day = (total_budget / travelers) / max(1, days)
+
+# skip rebuilding tables/exports when a rerun didn't touch any plan input
+plan_key = (destination, start_date, int(days), int(travelers), currency,
+            float(total_budget), tuple(sorted(weights.items())))
+if st.session_state.get("last_key") != plan_key:
+    alloc_df = build_allocation_df(weights, total_budget, currency)
+    daily = per_day_breakdown(weights, total_budget, days)
+    daily_amounts = np.fromiter(daily.values(), dtype=np.float64, count=len(daily))
+    daily_df = pd.DataFrame(
+        {"Category": list(daily),
+         "Per day": pd.Series(daily_amounts).map(lambda a: money(a, currency))}
+    )
+    itin_df, itin_records = generate_itinerary(int(days), destination, per_person_per_day)
+
+    export = {
+        "destination": destination,
+        "start": str(start_date),
+        "days": int(days),
+        "travelers": int(travelers),
+        "currency": currency,
+        "total_budget": float(total_budget),
+        "per_person_per_day": float(per_person_per_day),
+        "allocation_percent": weights,
+        "itinerary": itin_records,
+    }
+    json_bytes = json.dumps(export, indent=2, default=str).encode("utf-8")
+
+    st.session_state.update(
+        last_key=plan_key,
+        alloc_df=alloc_df,
+        daily_df=daily_df,
+        itin_df=itin_df,
+        json_bytes=json_bytes,
+    )
+else:
+    alloc_df = st.session_state["alloc_df"]
+    daily_df = st.session_state["daily_df"]
+    itin_df = st.session_state["itin_df"]
+    json_bytes = st.session_state["json_bytes"]
+
 # ---------- Main ----------
 st.title("🧳 Travel Budget Planner")
 st.caption("Quickly split your budget, visualize spending, and auto-generate a draft itinerary. (Streamlit)")
@@ -182,37 +304,42 @@ st.caption("Quickly split your budget, visualize spending, and auto-generate a d
 colA, colB, colC = st.columns([1.2, 1, 1])
 with colA:
     st.subheader("Budget Allocation")
-    alloc_df = build_allocation_df(weights, total_budget, currency)
-    st.dataframe(alloc_df, use_container_width=True)
+    st.dataframe(alloc_df, width="stretch")
 
 with colB:
     st.subheader("Pie Chart")
-    # matplotlib pie
-    fig, ax = plt.subplots()
-    labels = list(weights.keys())
-    sizes = [weights[k] for k in labels]
-    ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
-    ax.axis("equal")
-    st.pyplot(fig, clear_figure=True)
+    # rendered client-side by Vega-Lite; no server-side rasterization
+    st.vega_lite_chart(
+        alloc_df,
+        {
+            "encoding": {
+                "theta": {"field": "Share %", "type": "quantitative", "stack": True},
+                "color": {"field": "Category", "type": "nominal"},
+            },
+            "layer": [
+                {"mark": {"type": "arc", "outerRadius": 110, "tooltip": True}},
+                # per-slice percentage labels, as matplotlib's autopct gave
+                {
+                    "transform": [{"calculate": "format(datum['Share %'], '.1f') + '%'", "as": "Label"}],
+                    "mark": {"type": "text", "radius": 130},
+                    "encoding": {"text": {"field": "Label", "type": "nominal"}},
+                },
+            ],
+        },
+        width="stretch",
+    )
 
 with colC:
     st.subheader("Key Numbers")
-    per_person_per_day = (total_budget / travelers) / max(1, days)
     st.metric("Total Budget", money(total_budget, currency))
     st.metric("Per Person / Day", money(per_person_per_day, currency))
-    daily = per_day_breakdown(weights, total_budget, days)
-    daily_df = pd.DataFrame(
-        {"Category": list(daily.keys()),
-         "Per day": [money(v, currency) for v in daily.values()]}
-    )
     st.table(daily_df)
 
 st.divider()
 
 # Itinerary generator
 st.subheader("Draft Itinerary")
-itin_df = generate_itinerary(int(days), destination, per_person_per_day)
-st.dataframe(itin_df, use_container_width=True)
+st.dataframe(itin_df, width="stretch")
 
 # Tips (static examples; tune per destination later)
 st.markdown("### Cost-Saving Tips")
@@ -229,38 +356,26 @@ st.divider()
 st.subheader("Export")
 col1, col2 = st.columns(2)
 with col1:
-    json_bytes = io.BytesIO()
-    export = {
+    st.download_button("Download Plan (JSON)", data=json_bytes,
+                       file_name="travel_plan.json", mime="application/json")
+
+with col2:
+    pdf_data = {
         "destination": destination,
-        "start": str(start_date),
+        "start": start_date,
         "days": int(days),
         "travelers": int(travelers),
         "currency": currency,
         "total_budget": float(total_budget),
         "per_person_per_day": float(per_person_per_day),
-        "allocation_percent": weights,
-        "itinerary": itin_df.to_dict(orient="records"),
     }
-    json_bytes.write(pd.Series(export).to_json(indent=2).encode("utf-8"))
-    st.download_button("Download Plan (JSON)", data=json_bytes.getvalue(),
-                       file_name="travel_plan.json", mime="application/json")
-
-with col2:
-    try:
-        pdf_bytes = build_pdf(
-            {
-                "destination": destination,
-                "start": start_date,
-                "days": int(days),
-                "travelers": int(travelers),
-                "currency": currency,
-                "total_budget": float(total_budget),
-                "per_person_per_day": float(per_person_per_day),
-            },
-            alloc_df,
-            itin_df,
-        )
-        st.download_button("Download PDF", data=pdf_bytes,
+    # the PDF callable runs on click, where st.* calls are ignored, so check
+    # the user's text up front
+    bad_char = _pdf_unsupported_char(destination)
+    if bad_char is not None:
+        st.info(f"PDF export can't render '{bad_char}' in the destination name "
+                "(built-in PDF fonts are Latin-1 only). The JSON export has the full plan.")
+    else:
+        # built only when the button is clicked, not on every rerun
+        st.download_button("Download PDF", data=lambda: _cached_pdf(*_pdf_key(pdf_data, alloc_df, itin_df)),
                            file_name="travel_budget_plan.pdf", mime="application/pdf")
-    except Exception as e:
-        st.info("PDF export needs the 'fpdf2' package. If you see errors, run: `pip install fpdf2`.")